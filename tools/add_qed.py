@@ -1,82 +1,89 @@
 #!/usr/bin/env python3
 """
 Script to add \qed at the end of each solution and proof in LaTeX files.
+
+Each file is processed in a single linear pass by a two-state machine
+(normal text vs. inside a solution/proof body), so runtime is O(file
+size) regardless of how many sections a file has.
 """
 
 import os
 import re
 import glob
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+# Compiled once at import: the scan loops below run per line over potentially
+# very large chapter files, so avoid re-matching uncompiled patterns there.
+# The four section-boundary checks are fused into one alternation so each
+# line costs a single regex call instead of four.
+_SOLPROOF_RE = re.compile(r'\{(?:Solution|Proof):')
+_BOUNDARY_RE = re.compile(r'^\s*\\(?:begin\{problembox|section\{|chapter\{|subsection\{)')
 
 def add_qed_to_file(filepath):
-    """Add \qed at the end of each solution and proof in a LaTeX file."""
+    """Add \qed at the end of each solution and proof in a LaTeX file.
+
+    Streams the file line by line in a single pass: once a Solution/Proof
+    line is seen, remember the last non-blank line of its body; when the
+    next section boundary arrives, insert \qed there if the body didn't
+    already end with one. Output goes to a temp file in the same directory
+    and is swapped in atomically, so the file is never rewritten in place.
+    """
     print(f"Processing {filepath}...")
-    
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Split content into lines
-    lines = content.split('\n')
+
     modified = False
-    
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        
-        # Check if this line starts a solution or proof
-        if re.match(r'.*\{Solution:', line) or re.match(r'.*\{Proof:', line):
-            # Find where this solution/proof ends
-            j = i + 1
-            while j < len(lines):
-                # Look for the next problembox, section, or chapter
-                if (re.match(r'^\s*\\begin\{problembox', lines[j]) or 
-                    re.match(r'^\s*\\section\{', lines[j]) or 
-                    re.match(r'^\s*\\chapter\{', lines[j]) or
-                    re.match(r'^\s*\\subsection\{', lines[j])):
-                    break
-                j += 1
-            
-            # Check if the solution/proof already ends with \qed
-            if j > i + 1:
-                # Look at the last few lines of the solution/proof
-                end_lines = lines[i+1:j]
-                # Remove empty lines at the end
-                while end_lines and end_lines[-1].strip() == '':
-                    end_lines.pop()
-                
-                if end_lines and not end_lines[-1].strip().endswith('\\qed'):
-                    # Add \qed before the next problembox/section
-                    if j < len(lines):
-                        lines.insert(j, '\\qed')
-                        lines.insert(j, '')  # Add empty line before \qed
+    in_sol_proof = False
+    last_body_line = None  # last non-blank line of the current solution/proof body
+    out_lines = []
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            stripped = line.rstrip('\n')
+
+            if in_sol_proof:
+                if _BOUNDARY_RE.match(stripped):
+                    # Solution/proof ends here; add \qed if the body had
+                    # content and didn't already close with one.
+                    if last_body_line is not None and not last_body_line.strip().endswith('\\qed'):
+                        out_lines.append('\n')
+                        out_lines.append('\\qed\n')
                         modified = True
-                        print(f"  Added \\qed at line {j}")
-            
-            i = j
-        else:
-            i += 1
-    
+                        print(f"  Added \\qed at line {len(out_lines)}")
+                    in_sol_proof = False
+                    last_body_line = None
+                elif stripped.strip():
+                    last_body_line = stripped
+
+            if not in_sol_proof and _SOLPROOF_RE.search(stripped):
+                in_sol_proof = True
+                last_body_line = None
+
+            out_lines.append(line)
+
     if modified:
-        # Write back to file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(lines))
+        # Write to a temp file next to the original, then swap atomically
+        dirname = os.path.dirname(filepath) or '.'
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=dirname,
+                                         delete=False) as tmp:
+            tmp.writelines(out_lines)
+        # NamedTemporaryFile creates the file as 0600; carry over the
+        # original mode so the swap doesn't change permissions.
+        os.chmod(tmp.name, os.stat(filepath).st_mode)
+        os.replace(tmp.name, filepath)
         print(f"  Modified {filepath}")
     else:
         print(f"  No changes needed for {filepath}")
 
 def main():
     """Main function to process all LaTeX files."""
-    # Find all .tex files in the apostol directory
-    tex_files = glob.glob('*/ch*.tex')
-    
-    print(f"Found {len(tex_files)} LaTeX files to process:")
-    for file in tex_files:
-        print(f"  {file}")
-    
-    print("\nProcessing files...")
-    for filepath in tex_files:
-        add_qed_to_file(filepath)
-    
-    print("\nDone!")
+    print("Processing LaTeX files...")
+    # Each file is independent and CPU-bound on regex work, so fan out
+    # across cores. iglob streams directory entries into the pool as they
+    # are found instead of materializing the full file list up front.
+    with ProcessPoolExecutor() as executor:
+        count = len(list(executor.map(add_qed_to_file, glob.iglob('*/ch*.tex'), chunksize=4)))
+
+    print(f"\nDone! Processed {count} files.")
 
 if __name__ == "__main__":
     main()
@@ -7,6 +7,7 @@ for proper version control support.
 import os
 import re
 import glob
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 def convert_chapter_file(file_path):
@@ -16,23 +17,36 @@ def convert_chapter_file(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
         content = f.read()
     
-    # Pattern to match problembox environments that don't already have problemstatement
-    # This matches: \begin{problembox}[...] followed by content that's not \begin{problemstatement}
-    pattern = r'\\begin\{problembox\}\[([^\]]+)\]\s*\n(?!\s*\\begin\{problemstatement\})(.*?)\\end\{problembox\}'
-    
-    def replace_problembox(match):
-        title = match.group(1)
-        content = match.group(2).strip()
-        
-        # Skip if already has problemstatement
-        if '\\begin{problemstatement}' in content:
-            return match.group(0)
-        
-        # Convert to use problemstatement
-        return f'\\begin{{problembox}}[{title}]\n\\begin{{problemstatement}}\n{content}\n\\end{{problemstatement}}\n\\end{{problembox}}'
-    
-    # Apply the conversion
-    new_content = re.sub(pattern, replace_problembox, content, flags=re.DOTALL)
+    # Walk the file with str.find instead of a DOTALL '.*?' regex: the
+    # backtracking engine does quadratic work on large files with many
+    # problemboxes, while locating the literal delimiters is linear.
+    begin_tag = '\\begin{problembox}['
+    end_tag = '\\end{problembox}'
+
+    parts = []
+    pos = 0
+    while True:
+        start = content.find(begin_tag, pos)
+        if start < 0:
+            break
+        end_title = content.find(']', start + len(begin_tag))
+        end_box = content.find(end_tag, end_title)
+        if end_title < 0 or end_box < 0:
+            break  # malformed box; leave the rest of the file untouched
+
+        title = content[start + len(begin_tag):end_title]
+        body = content[end_title + 1:end_box].strip()
+
+        parts.append(content[pos:start])
+        if '\\begin{problemstatement}' in body:
+            # Already converted; keep the box as-is
+            parts.append(content[start:end_box + len(end_tag)])
+        else:
+            parts.append(f'\\begin{{problembox}}[{title}]\n\\begin{{problemstatement}}\n{body}\n\\end{{problemstatement}}\n\\end{{problembox}}')
+        pos = end_box + len(end_tag)
+
+    parts.append(content[pos:])
+    new_content = ''.join(parts)
     
     # Check if any changes were made
     if new_content != content:
@@ -55,28 +69,22 @@ def main():
     print("Converting Chapter Files to Use problemstatement Environment")
     print("=" * 60)
     
-    # Find all chapter files
-    chapter_files = glob.glob("ch*.tex")
-    
-    if not chapter_files:
+    print("Starting conversion...")
+    # Files are independent, so convert them in parallel across cores.
+    # iglob streams directory entries into the pool as they are found
+    # instead of materializing the full file list up front.
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(convert_chapter_file, glob.iglob("ch*.tex"), chunksize=4))
+
+    if not results:
         print("No chapter files (ch*.tex) found in current directory.")
         return
-    
-    print(f"Found {len(chapter_files)} chapter files:")
-    for f in sorted(chapter_files):
-        print(f"  - {f}")
-    
-    print("\nStarting conversion...")
-    converted_count = 0
-    
-    for chapter_file in sorted(chapter_files):
-        if convert_chapter_file(chapter_file):
-            converted_count += 1
-        print()
-    
+
+    converted_count = sum(results)
+
     print("=" * 60)
     print(f"Conversion complete!")
-    print(f"Converted {converted_count} out of {len(chapter_files)} files")
+    print(f"Converted {converted_count} out of {len(results)} files")
     
     if converted_count > 0:
         print("\nNext steps:")
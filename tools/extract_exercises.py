@@ -25,9 +25,12 @@ Notes:
 """
 
 import argparse
+import bisect
+import os
 import pathlib
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple, Optional
 
 import fitz  # PyMuPDF
@@ -42,11 +45,14 @@ DEFAULT_KEYWORDS = [
     "Review Questions",
     "Exercises and Problems",
 ]
+# Patterns are compiled in bytes mode: headings are ASCII, and matching
+# the encoded text avoids the str engine's wide-character inner loop.
+# Page text is encoded once (ASCII, errors ignored) right after extraction.
 CHAPTER_HEADING_PATTERNS = [
-    re.compile(r'^\s*Chapter\s+(\d+)\b', re.IGNORECASE),
-    re.compile(r'^\s*CHAPTER\s+(\d+)\b'),
+    re.compile(rb'^\s*Chapter\s+(\d+)\b', re.IGNORECASE),
+    re.compile(rb'^\s*CHAPTER\s+(\d+)\b'),
     # Numeric first-level style, e.g. "1 Probability Theory"
-    re.compile(r'^\s*(\d+)\s+[A-Z][A-Za-z].*'),
+    re.compile(rb'^\s*(\d+)\s+[A-Z][A-Za-z].*'),
 ]
 # ------------------------------------------
 
@@ -63,6 +69,9 @@ def get_toc_chapter_starts(doc: fitz.Document) -> List[Tuple[int, int, str]]:
       [(chapter_number, start_page_index, title), ...] sorted by start page.
 
     If title doesn't contain a number, assign chapter_number by order.
+
+    Postcondition: the result is ascending in start_page_index, so
+    build_chapter_ranges can consume it without re-sorting.
     """
     toc = doc.get_toc(simple=True)  # [ [level, title, page1based], ... ]
     if not toc:
@@ -74,8 +83,9 @@ def get_toc_chapter_starts(doc: fitz.Document) -> List[Tuple[int, int, str]]:
         if level != 1:
             continue
         ch_num = None
+        title_b = title.strip().encode('ascii', 'ignore')
         for rx in CHAPTER_HEADING_PATTERNS:
-            m = rx.match(title.strip())
+            m = rx.match(title_b)
             if m:
                 try:
                     ch_num = int(m.group(1))
@@ -95,15 +105,76 @@ def get_toc_chapter_starts(doc: fitz.Document) -> List[Tuple[int, int, str]]:
     return chapters
 
 
-def scan_for_chapter_starts(doc: fitz.Document) -> List[Tuple[int, int, str]]:
+def page_text(doc: fitz.Document, i: int) -> bytes:
+    """Full text of page i as ASCII bytes."""
+    return (doc.load_page(i).get_text("text") or "").encode('ascii', 'ignore')
+
+
+# Chapter headings on title pages sit well below the running-header zone
+# (about 22% of page height on the PDFs in this repo), so the scan clip
+# must reach the top half; a tighter clip sees only running headers and
+# misses the real title pages.
+_TOP_FRACTION = 0.5
+
+
+def _top_text(page: fitz.Page, frac: Optional[float] = _TOP_FRACTION) -> bytes:
+    """Extract a page's text as ASCII bytes, clipped to the top `frac` of
+    the page; frac=None extracts the full page."""
+    if frac is None:
+        text = page.get_text("text") or ""
+    else:
+        clip = fitz.Rect(0, 0, page.rect.width, page.rect.height * frac)
+        text = page.get_text("text", clip=clip) or ""
+    return text.encode('ascii', 'ignore')
+
+
+def _top_texts_chunk(path: str, lo: int, hi: int, frac: Optional[float]) -> List[bytes]:
+    """Worker: extract top-of-page text for pages [lo, hi).
+
+    MuPDF document objects are not thread-safe, but distinct documents
+    are, so each worker opens its own handle on the input file.
+    """
+    doc = fitz.open(path)
+    try:
+        return [_top_text(doc.load_page(i), frac) for i in range(lo, hi)]
+    finally:
+        doc.close()
+
+
+def _all_top_texts(doc: fitz.Document, path: Optional[str],
+                   frac: Optional[float] = _TOP_FRACTION) -> List[bytes]:
+    """Top-of-page text for every page, extracted in parallel when a file
+    path is available (workers need their own document handles)."""
+    n = doc.page_count
+    workers = min(os.cpu_count() or 1, 8)
+    if path is None or workers < 2 or n < 2 * workers:
+        return [_top_text(doc.load_page(i), frac) for i in range(n)]
+
+    chunk = -(-n // workers)  # ceil division
+    bounds = [(lo, min(lo + chunk, n)) for lo in range(0, n, chunk)]
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        chunks = ex.map(lambda b: _top_texts_chunk(path, b[0], b[1], frac), bounds)
+        return [t for c in chunks for t in c]
+
+
+def scan_for_chapter_starts(doc: fitz.Document, path: Optional[str] = None) -> List[Tuple[int, int, str]]:
     """
     Fallback when no TOC: scan pages for "Chapter N" or "N Title" patterns near the top.
-    Return [(chapter_number, start_page_index, title_or_line), ...] ordered by chapter number.
+    Return [(chapter_number, start_page_index, title_or_line), ...] sorted by start page.
+
+    Postcondition: the result is ascending in start_page_index (a stray
+    late-page hit for a low chapter number sorts by where it appears), so
+    build_chapter_ranges can consume it without re-sorting.
     """
     starts = {}
-    for i in range(doc.page_count):
-        text = doc.load_page(i).get_text("text") or ""
-        lines = [ln.strip() for ln in text.splitlines()[:25]]
+    for i, text in enumerate(_all_top_texts(doc, path)):
+        lines = [ln.strip() for ln in text.split(b'\n', 25)[:25]]
+        # Fast path: a heading line needs either a 'Chapter'/'CHAPTER'
+        # token or a leading digit, so cheap C-level checks over exactly
+        # the lines inspected below rule out most pages before any regex
+        # runs.
+        if b'hapter' not in text and not any(ln[:1].isdigit() for ln in lines):
+            continue
         for ln in lines:
             for rx in CHAPTER_HEADING_PATTERNS:
                 m = rx.match(ln)
@@ -111,7 +182,7 @@ def scan_for_chapter_starts(doc: fitz.Document) -> List[Tuple[int, int, str]]:
                     try:
                         ch = int(m.group(1))
                         if ch not in starts:
-                            starts[ch] = (ch, i, ln)
+                            starts[ch] = (ch, i, ln.decode('ascii', 'ignore'))
                         break
                     except Exception:
                         pass
@@ -120,82 +191,146 @@ def scan_for_chapter_starts(doc: fitz.Document) -> List[Tuple[int, int, str]]:
             break
     if not starts:
         return []
-    return sorted(starts.values(), key=lambda x: (x[0], x[1]))
+    return sorted(starts.values(), key=lambda x: x[1])
 
 
 def build_chapter_ranges(starts: List[Tuple[int, int, str]], total_pages: int) -> List[Tuple[int, int, int, str]]:
     """
     Given chapter starts [(ch_num, start_idx, title)], build ranges
     [(ch_num, start_idx, end_idx, title)].
+
+    Precondition: starts must be ascending in start_idx; both producers
+    (get_toc_chapter_starts, scan_for_chapter_starts) sort by page before
+    returning, so no re-sort is needed here.
     """
     ranges = []
     if not starts:
         return ranges
-    starts_sorted = sorted(starts, key=lambda x: x[1])  # by page
-    for idx, (ch, sp, title) in enumerate(starts_sorted):
-        ep = (starts_sorted[idx + 1][1] - 1) if idx + 1 < len(starts_sorted) else (total_pages - 1)
+    for idx, (ch, sp, title) in enumerate(starts):
+        ep = (starts[idx + 1][1] - 1) if idx + 1 < len(starts) else (total_pages - 1)
         if ep >= sp:
             ranges.append((ch, sp, ep, title))
     return ranges
 
 
-def page_has_heading(text: str, keywords: List[str], top_lines: int = 25) -> bool:
+def compile_heading_regex(keywords: List[str]) -> re.Pattern:
+    """
+    Compile the heading keywords into one anchored, case-insensitive
+    alternation so each line costs a single match call instead of a
+    Python-level loop (with a .lower() allocation) per keyword.
+    Compiled in bytes mode to match the encoded page text.
+    """
+    joined = b'|'.join(re.escape(k).encode('ascii', 'ignore') for k in keywords)
+    return re.compile(rb'^\s*(?:' + joined + rb')', re.IGNORECASE)
+
+
+def page_has_heading(text: bytes, heading_re: re.Pattern, top_lines: int = 25) -> bool:
     """
     Check if page has a heading line that starts with any keyword, looking only in the top few lines.
     """
-    lines = [ln.strip() for ln in text.splitlines()[:top_lines]]
-    for ln in lines:
-        for kw in keywords:
-            # exact prefix match (case sensitive for style preservation, but compare case-insensitively)
-            if ln.lower().startswith(kw.lower()):
-                return True
-    return False
+    # split with maxsplit bounds the work to the inspected lines; the last
+    # element holds the unsplit remainder of the page and is dropped.
+    return any(heading_re.match(ln) for ln in text.split(b'\n', top_lines)[:top_lines])
+
+
+def find_heading_pages(doc: fitz.Document, path: Optional[str], heading_re: re.Pattern) -> List[int]:
+    """
+    One linear pass over the whole document: page indices whose top text
+    matches the heading regex, sorted ascending. Chapter-level lookups
+    then bisect into this list instead of rescanning their page ranges.
+
+    Uses full-page text (frac=None) so the top-25-line window matches
+    what the per-chapter scan always inspected: on sparse pages those
+    lines can sit anywhere on the page, below any fixed clip.
+    """
+    return [i for i, text in enumerate(_all_top_texts(doc, path, frac=None))
+            if page_has_heading(text, heading_re)]
+
+
+def _heading_page_at(heading_pages: List[int], i: int) -> bool:
+    k = bisect.bisect_left(heading_pages, i)
+    return k < len(heading_pages) and heading_pages[k] == i
 
 
 def detect_exercises_start(
     doc: fitz.Document,
     ch_range: Tuple[int, int, int, str],
-    keywords: List[str],
+    heading_re: re.Pattern,
     min_num_count: int = 2,
+    heading_pages: Optional[List[int]] = None,
 ) -> Optional[int]:
     """
     Detect the page index within [start, end] where exercises/problems begin.
 
     Heuristics:
-      1) Look for heading keywords near top of the page.
+      1) Look for heading keywords near top of the page. With a precomputed
+         heading_pages list this is a bisect instead of a page scan.
       2) If missing, count lines that look like '<chapter>.<number>' (e.g., '12.5'):
          - Scan from the end toward the front (exercises usually near the end).
          - Pick the earliest-from-end page that has >= min_num_count such lines.
     """
     ch_num, start, end, _title = ch_range
 
-    # 1) Heading-based detection (scan start->end)
-    for i in range(start, end + 1):
-        text = doc.load_page(i).get_text("text") or ""
-        if page_has_heading(text, keywords):
-            return i
-
-    # 2) Numbering density detection (scan end->start)
-    rx_num = re.compile(rf'^\s*{ch_num}\.\d+\b')
+    # 1) Heading-based detection: bisect into the precomputed document-wide
+    # heading list when available (a heading hit then needs no page decode
+    # at all); otherwise scan this chapter's pages start->end.
+    texts = None
+    if heading_pages is not None:
+        k = bisect.bisect_left(heading_pages, start)
+        if k < len(heading_pages) and heading_pages[k] <= end:
+            return heading_pages[k]
+    else:
+        texts = [page_text(doc, i) for i in range(start, end + 1)]
+        for i in range(start, end + 1):
+            if page_has_heading(texts[i - start], heading_re):
+                return i
+
+    # Decode each chapter page once for the numbering heuristic; both it
+    # and the previous-page recheck index into this list.
+    if texts is None:
+        texts = [page_text(doc, i) for i in range(start, end + 1)]
+
+    # 2) Numbering density detection (scan end->start). One MULTILINE
+    # findall per page runs entirely in the C engine instead of a Python
+    # split/strip/match per line.
+    rx_num = re.compile(rf'^[ \t]*{ch_num}\.\d+\b'.encode('ascii'), re.MULTILINE)
     for i in range(end, start - 1, -1):
-        text = doc.load_page(i).get_text("text") or ""
-        cnt = sum(1 for ln in text.splitlines() if rx_num.match(ln.strip()))
+        cnt = len(rx_num.findall(texts[i - start]))
         if cnt >= min_num_count:
             # Walk backward to include any preceding page with a header like "Exercises 12"
             # If previous page top contains the keyword, shift start one page earlier.
             if i - 1 >= start:
-                prev_text = doc.load_page(i - 1).get_text("text") or ""
-                if page_has_heading(prev_text, keywords):
+                if heading_pages is not None:
+                    prev_heading = _heading_page_at(heading_pages, i - 1)
+                else:
+                    prev_heading = page_has_heading(texts[i - 1 - start], heading_re)
+                if prev_heading:
                     return i - 1
             return i
 
     return None
 
 
+def _detect_for_range(path: str, ch_range, heading_re: re.Pattern, min_num_count: int,
+                      heading_pages: Optional[List[int]] = None) -> Optional[int]:
+    """Detection worker: opens its own document handle (MuPDF documents
+    are single-threaded) and runs detect_exercises_start on one chapter."""
+    doc = fitz.open(path)
+    try:
+        return detect_exercises_start(doc, ch_range, heading_re,
+                                      min_num_count=min_num_count,
+                                      heading_pages=heading_pages)
+    finally:
+        doc.close()
+
+
 def extract_pdf_range(doc: fitz.Document, start: int, end: int, outfile: pathlib.Path) -> None:
     out = fitz.open()
     out.insert_pdf(doc, from_page=start, to_page=end)
-    out.save(outfile.as_posix())
+    # Pages are copied verbatim from the source, so skip the garbage
+    # collection, stream re-compression and syntax clean-up passes that
+    # save() would otherwise run.
+    out.save(str(outfile), garbage=0, deflate=False, clean=False)
     out.close()
 
 
@@ -224,7 +359,7 @@ def main():
     starts = get_toc_chapter_starts(doc)
     if len(starts) < 2:
         print("[INFO] TOC not found or too small; scanning for chapter starts…")
-        starts = scan_for_chapter_starts(doc)
+        starts = scan_for_chapter_starts(doc, inpath.as_posix())
 
     if not starts:
         print("[ERROR] Could not detect chapter starts (no TOC and no 'Chapter N' headings).", file=sys.stderr)
@@ -239,9 +374,23 @@ def main():
     outdir = pathlib.Path(args.outdir) if args.outdir else inpath.with_suffix("").parent / (inpath.stem + "_exercises")
     outdir.mkdir(parents=True, exist_ok=True)
 
+    heading_re = compile_heading_regex(args.keywords)
+
+    # One linear pass over the whole document finds every heading page;
+    # per-chapter detection then bisects into it instead of rescanning
+    # O(chapters x pages_per_chapter) pages.
+    heading_pages = find_heading_pages(doc, inpath.as_posix(), heading_re)
+
+    # Chapters are independent, so run the page-scanning detection phase in
+    # parallel; extraction below stays serial on the shared document.
+    with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 1, 8)) as ex:
+        ex_starts = list(ex.map(
+            lambda r: _detect_for_range(inpath.as_posix(), r, heading_re,
+                                        args.min_num_count, heading_pages),
+            ranges))
+
     made_any = False
-    for ch_num, sp, ep, title in ranges:
-        ex_start = detect_exercises_start(doc, (ch_num, sp, ep, title), keywords=args.keywords, min_num_count=args.min_num_count)
+    for (ch_num, sp, ep, title), ex_start in zip(ranges, ex_starts):
         if ex_start is None:
             print(f"[WARN] Chapter {ch_num:02d}: no exercises/probs detected (pages {sp+1}-{ep+1}, title: {title!r}).")
             continue
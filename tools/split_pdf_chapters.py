@@ -1,13 +1,20 @@
 import re
 import sys
 import pathlib
+from concurrent.futures import ThreadPoolExecutor
+
 import fitz  # PyMuPDF
 
-CHAPTER_PATTERNS = [
-    re.compile(r'^\s*Chapter\s+(\d+)\b', re.IGNORECASE),
-    re.compile(r'^\s*CHAPTER\s+(\d+)\b'),
-    re.compile(r'^\s*(\d+)\s+[A-Z][A-Za-z].*'),  # e.g., "1 Probability Theory"
-]
+# Single alternation covering "Chapter N" / "CHAPTER N" and numeric
+# first-level headings like "1 Probability Theory"; one match call per
+# line instead of looping over separate patterns. The chapter number is
+# whichever group matched. Compiled in bytes mode: headings are ASCII,
+# and matching encoded text skips the str engine's wide-character path.
+CHAPTER_RE = re.compile(rb'^\s*(?:(?i:chapter)\s+(\d+)\b|(\d+)\s+[A-Z][A-Za-z].*)')
+
+def _chapter_number(m):
+    """Return the chapter number from a CHAPTER_RE match."""
+    return int(next(g for g in m.groups() if g))
 
 def slugify(s: str) -> str:
     s = re.sub(r'\s+', ' ', s).strip()
@@ -24,14 +31,12 @@ def detect_chapters_by_toc(doc):
             continue
         # try to parse chapter number from title; if not, assign by order
         chnum = None
-        for rx in CHAPTER_PATTERNS:
-            m = rx.match(title.strip())
-            if m:
-                try:
-                    chnum = int(m.group(1))
-                except Exception:
-                    pass
-                break
+        m = CHAPTER_RE.match(title.strip().encode('ascii', 'ignore'))
+        if m:
+            try:
+                chnum = _chapter_number(m)
+            except Exception:
+                pass
         if chnum is None:
             chnum = len(chapters) + 1
         if chnum in seen:
@@ -45,22 +50,26 @@ def detect_chapters_by_scanning(doc):
     """Fallback: scan pages for lines like 'Chapter N' near the top."""
     chapters = {}
     for i in range(doc.page_count):
-        text = (doc.load_page(i).get_text("text") or "")
+        page = doc.load_page(i)
+        # Only the top of the page is inspected, so clip extraction to the
+        # top half and skip decoding the rest. Chapter headings on title
+        # pages sit around 22% of page height, below the running headers,
+        # so the clip must not be tighter than that.
+        clip = fitz.Rect(0, 0, page.rect.width, page.rect.height * 0.5)
+        # Encode once to ASCII bytes so the per-line matching below runs
+        # on the faster bytes regex path.
+        text = (page.get_text("text", clip=clip) or "").encode('ascii', 'ignore')
         lines = [ln.strip() for ln in text.splitlines()[:20]]  # top portion
         for ln in lines:
-            for rx in CHAPTER_PATTERNS:
-                m = rx.match(ln)
-                if m:
-                    try:
-                        ch = int(m.group(1))
-                        if ch not in chapters:
-                            chapters[ch] = (ch, i, ln)
-                        break
-                    except Exception:
-                        pass
-            else:
-                continue
-            break
+            m = CHAPTER_RE.match(ln)
+            if m:
+                try:
+                    ch = _chapter_number(m)
+                except Exception:
+                    continue
+                if ch not in chapters:
+                    chapters[ch] = (ch, i, ln.decode('ascii', 'ignore'))
+                break
     # Return sorted by chapter number, then by page
     return sorted(chapters.values(), key=lambda x: (x[0], x[1]))
 
@@ -95,18 +104,31 @@ def main(inpdf):
     outdir = inpath.with_suffix("").as_posix() + "_chapters"
     pathlib.Path(outdir).mkdir(parents=True, exist_ok=True)
 
-    for chn, sp, ep, title in ranges:
+    def write_range(chrange):
+        chn, sp, ep, title = chrange
         # Generate a neat filename with title if possible
         safe_title = slugify(title)
         outfile = pathlib.Path(outdir) / f"{inpath.stem}_Chapter-{chn:02d}_{safe_title}.pdf"
 
-        # Write this range using PyMuPDF (fast and keeps fidelity)
-        outdoc = fitz.open()
-        outdoc.insert_pdf(doc, from_page=sp, to_page=ep)
-        outdoc.save(outfile.as_posix())
-        outdoc.close()
+        # MuPDF documents are single-threaded, so each worker opens its
+        # own handle on the source file.
+        src = fitz.open(inpdf)
+        try:
+            outdoc = fitz.open()
+            outdoc.insert_pdf(src, from_page=sp, to_page=ep)
+            # Pages are copied verbatim, so skip the garbage-collection,
+            # deflate and clean rewrite passes on save.
+            outdoc.save(str(outfile), garbage=0, deflate=False, clean=False)
+            outdoc.close()
+        finally:
+            src.close()
         print(f"Wrote: {outfile}")
 
+    # Chapter writes are independent and MuPDF releases the GIL during
+    # stream I/O, so run them in a thread pool.
+    with ThreadPoolExecutor() as ex:
+        list(ex.map(write_range, ranges))
+
     doc.close()
 
 if __name__ == "__main__":
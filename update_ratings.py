@@ -1,24 +1,24 @@
+import pathlib
 import re
 
-# Read the file
-with open('apostol/ch1.tex', 'r', encoding='utf-8') as f:
-    content = f.read()
-
-# Pattern to match problembox with emoji ratings
-pattern = r'\\begin\{problembox\}\[([^\\]+)\\emoji\{star\}:([0-9.]+)\\emoji\{thinking-face\}:([0-9.]+)\]'
+# Pattern to match problembox with emoji ratings. Compiled in bytes mode:
+# the markup is pure ASCII, so matching the raw bytes skips the UTF-8
+# decode/encode round trip and the str engine's wide-character path.
+_RATING_RE = re.compile(
+    rb'\\begin\{problembox\}\[([^\\]+)\\emoji\{star\}:([0-9.]+)\\emoji\{thinking-face\}:([0-9.]+)\]'
+)
 
 # Function to replace each match
 def replace_match(match):
     problem_name = match.group(1)
     importance = match.group(2)
     difficulty = match.group(3)
-    return f'\\begin{{problembox}}[{problem_name}]\n\\problemrating{{{importance}}}{{{difficulty}}}'
-
-# Replace all matches
-updated_content = re.sub(pattern, replace_match, content)
+    return b'\\begin{problembox}[%s]\n\\problemrating{%s}{%s}' % (
+        problem_name, importance, difficulty)
 
-# Write back to file
-with open('apostol/ch1.tex', 'w', encoding='utf-8') as f:
-    f.write(updated_content)
+# One read, one substitution, one write; the sub() result is a fresh
+# bytes object anyway, so plain read_bytes beats the mmap ceremony.
+path = pathlib.Path('apostol/ch1.tex')
+path.write_bytes(_RATING_RE.sub(replace_match, path.read_bytes()))
 
 print("Updated all problem ratings in ch1.tex")